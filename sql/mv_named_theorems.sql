@@ -0,0 +1,72 @@
+-- Named results ("Nakayama's lemma", "Hahn–Banach theorem") for the in-memory
+-- name index behind the named-theorem fast path (src/name_index.py).
+-- Names come from theorem_name, and from slogans that open with a named
+-- result. A name must contain a proper-name token: a capitalized word of two
+-- or more letters that is not a result type, a roman numeral or a generic
+-- descriptor. That drops labels such as "Theorem A", "Lemma B", "Proposition
+-- C", "Theorem IV" and "Main Theorem". Only the 20 most-cited rows are kept
+-- per name.
+--   REFRESH MATERIALIZED VIEW CONCURRENTLY mv_named_theorems;
+-- To apply a changed definition: DROP MATERIALIZED VIEW mv_named_theorems;
+-- then re-run this file.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_named_theorems AS
+WITH names AS (
+    SELECT slogan_id, citations, theorem_name AS name
+    FROM theorem_search_qwen8b
+    UNION
+    SELECT
+        slogan_id,
+        citations,
+        substring(
+            theorem_slogan
+            from '^(?:The )?((?:[A-Z][[:alpha:]''’–-]*[ -])+(?:[Tt]heorem|[Ll]emma|[Cc]onjecture|[Ii]nequality|[Ff]ormula|[Pp]rinciple|[Cc]riterion|[Ii]dentity))\M'
+        ) AS name
+    FROM theorem_search_qwen8b
+),
+candidates AS (
+    SELECT name, slogan_id, citations
+    FROM names
+    WHERE name IS NOT NULL
+      AND length(name) <= 80
+      AND name !~ '[0-9]'
+      AND name ~ '\s'
+      -- Bare labels: a result type followed by a letter or roman numeral.
+      AND name !~* '^\s*(theorem|lemma|proposition|corollary|claim|conjecture)\s+([[:alpha:]]|[ivxlcdm]+)[''’′*]*\.?\s*$'
+      AND EXISTS (
+          SELECT 1
+          FROM regexp_split_to_table(name, '[\s–—-]+') AS t(token)
+          WHERE token ~ '^[[:upper:]][[:alpha:]''’]+$'
+            AND token !~ '^[IVXLCDM]+$'
+            AND lower(regexp_replace(token, '[''’]s?$', '')) NOT IN (
+                -- articles and connectives
+                'the', 'a', 'an', 'of', 'on', 'for', 'and', 'in', 'to', 'with',
+                -- result types
+                'theorem', 'theorems', 'lemma', 'lemmas', 'proposition',
+                'corollary', 'claim', 'conjecture', 'inequality', 'formula',
+                'principle', 'criterion', 'identity', 'definition', 'remark',
+                'fact', 'observation', 'step', 'case', 'part', 'assumption',
+                -- generic descriptors
+                'main', 'key', 'technical', 'auxiliary', 'basic', 'general',
+                'fundamental', 'first', 'second', 'third', 'final', 'new',
+                'structure', 'classification', 'comparison', 'uniqueness',
+                'existence', 'estimate', 'estimates', 'bound', 'bounds'
+            )
+      )
+),
+ranked AS (
+    SELECT
+        name,
+        slogan_id,
+        row_number() OVER (
+            PARTITION BY lower(name)
+            ORDER BY citations DESC NULLS LAST, slogan_id
+        ) AS rn
+    FROM candidates
+)
+SELECT name, slogan_id
+FROM ranked
+WHERE rn <= 20;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_named_theorems_pk
+    ON mv_named_theorems (name, slogan_id);
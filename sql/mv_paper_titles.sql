@@ -0,0 +1,18 @@
+-- Distinct paper titles used to resolve the "Filter by Paper" title substrings
+-- to paper_ids before the ANN query (see resolve_paper_titles in src/db.py).
+-- Refresh alongside the other mv_* views:
+--   REFRESH MATERIALIZED VIEW CONCURRENTLY mv_paper_titles;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_paper_titles AS
+SELECT DISTINCT paper_id, title
+FROM theorem_search_qwen8b
+WHERE paper_id IS NOT NULL
+  AND title IS NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_paper_titles_pk
+    ON mv_paper_titles (paper_id, title);
+
+CREATE INDEX IF NOT EXISTS mv_paper_titles_title_trgm
+    ON mv_paper_titles USING gin (title gin_trgm_ops);
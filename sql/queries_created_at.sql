@@ -0,0 +1,9 @@
+-- Timestamps for the query log, used by the cache warmer to pick the most
+-- frequent recent queries (load_frequent_queries in src/db.py). Existing
+-- rows get the time this migration runs.
+
+ALTER TABLE public.queries
+    ADD COLUMN IF NOT EXISTS created_at timestamptz NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS queries_created_at_idx
+    ON public.queries (created_at);
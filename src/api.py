@@ -0,0 +1,214 @@
+"""
+Async HTTP/JSON search service, the programmatic counterpart of the UI.
+
+    python src/api.py --port 8000
+
+POST /search
+    {"query": "...", "filters": {...}, "top_k": 25, "citation_weight": 0.0}
+Filters use the same keys as the sidebar (see utils.filters_from_json);
+top_k (1..50, as in the sidebar) and citation_weight may be given at the top
+level or inside filters. Returns {"query", "results": [...], "timings": {...}};
+invalid requests get a 400 and database or embedding failures a 503, both
+as {"error": "..."}.
+
+GET /healthz returns {"status": "ok"}.
+
+Searches run as coroutines on a psycopg 3 async connection pool and the async
+OpenAI client, sharing the SQL and ranking of db.fetch_results.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import time
+
+import psycopg
+from aiohttp import web
+from openai import AsyncOpenAI, OpenAIError
+from pgvector.psycopg import register_vector_async
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from db import (
+    _FULL_ROWS_SQL,
+    _PAPER_TITLES_SQL,
+    _SEARCH_PARAMS_SQL,
+    _SOURCE_CAPS_SQL,
+    _candidate_params,
+    _candidate_sql,
+    _conn_kwargs,
+    _extra_where,
+    _get_secret,
+    _paper_ids_or_none,
+    _paper_titles_params,
+    _rank_candidates,
+    _search_params,
+)
+from records import ResultRow
+from search import build_filter_clauses
+from utils import filters_from_json, json_safe
+
+_json_dumps = functools.partial(json.dumps, default=str)
+
+# Same bounds as the sidebar's "Number of Results" slider.
+MIN_TOP_K, MAX_TOP_K = 1, 50
+
+
+async def _configure(conn):
+    await register_vector_async(conn)
+    await conn.commit()
+
+
+async def _on_startup(app):
+    secret = await asyncio.to_thread(_get_secret)
+    pool = AsyncConnectionPool(
+        make_conninfo(**_conn_kwargs(secret)),
+        min_size=int(os.getenv("API_POOL_MIN_CONN", 2)),
+        max_size=int(os.getenv("API_POOL_MAX_CONN", 20)),
+        configure=_configure,
+        open=False,
+    )
+    await pool.open()
+    app["pool"] = pool
+    app["openai"] = AsyncOpenAI(
+        base_url="https://api.tokenfactory.nebius.com/v1/",
+        api_key=os.environ.get("NEBIUS_API_KEY"),
+    )
+    async with pool.connection() as conn:
+        cur = await conn.execute(_SOURCE_CAPS_SQL)
+        app["source_caps"] = {row[0]: {"has_metadata": row[1]} for row in await cur.fetchall()}
+
+
+async def _on_cleanup(app):
+    await app["pool"].close()
+    await app["openai"].close()
+
+
+async def _embed(app, query):
+    response = await app["openai"].embeddings.create(
+        model="Qwen/Qwen3-Embedding-8B",
+        input=query
+    )
+    return response.data[0].embedding
+
+
+async def _resolve_titles(pool, titles):
+    if not titles:
+        return []
+    async with pool.connection() as conn:
+        cur = await conn.execute(_PAPER_TITLES_SQL, _paper_titles_params(sorted(titles)))
+        return _paper_ids_or_none(await cur.fetchall())
+
+
+async def _source_candidates(pool, source, query_vec, citation_weight, top_k, extra_where, filter_params):
+    async with pool.connection() as conn:
+        await conn.execute(_SEARCH_PARAMS_SQL, _search_params(top_k))
+        cur = await conn.execute(
+            _candidate_sql(extra_where),
+            _candidate_params(source, query_vec, citation_weight, top_k, filter_params),
+        )
+        return await cur.fetchall()
+
+
+async def _hydrate(pool, slogan_rows):
+    if not slogan_rows:
+        return []
+    score_map = {r[0]: (r[1], r[2]) for r in slogan_rows}
+    async with pool.connection() as conn:
+        cur = await conn.execute(_FULL_ROWS_SQL, {"ids": [r[0] for r in slogan_rows]})
+        rows = await cur.fetchall()
+    return [ResultRow(row, *score_map[row[0]]) for row in rows]
+
+
+async def search(app, query, filters):
+    pool = app["pool"]
+    t0 = time.perf_counter()
+    query_vec, title_paper_ids = await asyncio.gather(
+        _embed(app, query),
+        _resolve_titles(pool, filters["paper_filter"]["titles"]),
+    )
+    embed_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    where_clauses, where_params = build_filter_clauses(
+        filters,
+        app["source_caps"],
+        resolve_titles=lambda _: title_paper_ids,
+    )
+    extra_where = _extra_where(where_clauses)
+    top_k = filters["top_k"]
+    per_source = await asyncio.gather(*(
+        _source_candidates(
+            pool,
+            source,
+            query_vec,
+            filters["citation_weight"],
+            top_k,
+            extra_where,
+            where_params,
+        )
+        for source in filters["sources"]
+    ))
+    ranked = _rank_candidates([r for rows in per_source for r in rows], top_k)
+    results = await _hydrate(pool, ranked)
+    return results, {"embed": embed_time, "sql": time.perf_counter() - t0}
+
+
+async def handle_search(request):
+    try:
+        body = await request.json()
+        query = body["query"]
+        raw_filters = dict(body.get("filters") or {})
+        for key in ("top_k", "citation_weight"):
+            if key in body:
+                raw_filters[key] = body[key]
+        filters = filters_from_json(raw_filters)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return web.json_response({"error": f"invalid request: {e}"}, status=400)
+
+    if not isinstance(query, str) or not query.strip():
+        return web.json_response({"error": "query must be a non-empty string"}, status=400)
+    if not MIN_TOP_K <= filters["top_k"] <= MAX_TOP_K:
+        return web.json_response(
+            {"error": f"top_k must be between {MIN_TOP_K} and {MAX_TOP_K}"}, status=400
+        )
+
+    try:
+        results, timings = await search(request.app, query, filters)
+    except (psycopg.Error, OpenAIError) as e:
+        print(f"Search failed for {query!r}: {e!r}", flush=True)
+        return web.json_response({"error": "search backend unavailable, try again later"}, status=503)
+    return web.json_response(
+        json_safe({
+            "query": query,
+            "results": [r.to_dict() for r in results],
+            "timings": timings,
+        }),
+        dumps=_json_dumps,
+    )
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok"})
+
+
+def make_app():
+    app = web.Application()
+    app.on_startup.append(_on_startup)
+    app.on_cleanup.append(_on_cleanup)
+    app.router.add_post("/search", handle_search)
+    app.router.add_get("/healthz", handle_health)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Theorem search JSON API.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    web.run_app(make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
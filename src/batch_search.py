@@ -0,0 +1,151 @@
+"""
+Headless batch search for offline evaluation and regression runs.
+
+    python src/batch_search.py queries.jsonl -o results.jsonl --workers 4
+
+Each input line is {"id": ..., "query": "...", "filters": {...}}. Filters use
+the keys the sidebar produces (see utils.filters_from_json); missing keys take
+the sidebar defaults. Queries are embedded in batches in the parent process
+and searched by a pool of worker processes, each with its own connection
+pool. One result line is written per input line, in input order; lines that
+cannot be searched (invalid JSON, no "query", an embedding batch that still
+fails after --embed-retries retries) get {"id", "query", "error"} instead.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from itertools import islice
+
+from db import embed_queries, fetch_results, load_source_caps
+from search import build_filter_clauses
+from utils import filters_from_json, json_safe
+
+_source_caps = None
+
+
+def _init_worker(source_caps):
+    global _source_caps
+    _source_caps = source_caps
+
+
+def _run_one(task):
+    item, query_vec, full, error = task
+    out = {"id": item.get("id"), "query": item.get("query")}
+    if error is not None:
+        out["error"] = error
+        return out
+    try:
+        filters = filters_from_json(item.get("filters"))
+        where_clauses, where_params = build_filter_clauses(filters, _source_caps)
+        rows = fetch_results(
+            query_vec=query_vec,
+            citation_weight=filters["citation_weight"],
+            top_k=filters["top_k"],
+            selected_sources=filters["sources"],
+            filter_clauses=where_clauses,
+            filter_params=where_params,
+        )
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+        return out
+
+    out["results"] = [
+        r.to_dict() if full else {
+            "rank": rank,
+            "slogan_id": r["slogan_id"],
+            "paper_id": r["paper_id"],
+            "theorem_name": r["theorem_name"],
+            "link": r["link"],
+            "source": r["source"],
+            "similarity": r["similarity"],
+            "score": r["score"],
+        }
+        for rank, r in enumerate(rows, 1)
+    ]
+    return out
+
+
+def _read_items(f):
+    """Yield (item, error) per non-blank line; error is None for valid items."""
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield {}, f"invalid JSON: {e}"
+            continue
+        if not isinstance(item, dict):
+            yield {}, "each line must be a JSON object"
+        elif not isinstance(item.get("query"), str) or not item["query"].strip():
+            yield item, 'missing "query" string'
+        else:
+            yield item, None
+
+
+def _embed_with_retries(queries, retries):
+    for attempt in range(retries + 1):
+        try:
+            return embed_queries(queries)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** attempt
+            print(f"Embedding batch failed ({e}); retrying in {delay}s", file=sys.stderr, flush=True)
+            time.sleep(delay)
+
+
+def _tasks(entries, batch_size, full, retries):
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return
+        queries = [item["query"] for item, error in batch if error is None]
+        vecs, batch_error = iter(()), None
+        if queries:
+            try:
+                vecs = iter(_embed_with_retries(queries, retries))
+            except Exception as e:
+                batch_error = f"embedding failed: {type(e).__name__}: {e}"
+        for item, error in batch:
+            if error is None and batch_error is None:
+                yield item, next(vecs), full, None
+            else:
+                yield item, None, full, error or batch_error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch theorem search over JSONL queries.")
+    parser.add_argument("input", help="JSONL file of queries, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes")
+    parser.add_argument("--embed-batch-size", type=int, default=32, help="queries per embedding request")
+    parser.add_argument("--embed-retries", type=int, default=3, help="retries per failed embedding batch")
+    parser.add_argument("--full", action="store_true", help="write every result column, including theorem bodies")
+    args = parser.parse_args(argv)
+
+    source_caps = load_source_caps()
+
+    fin = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    fout = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    # spawn, so workers never inherit the parent's pooled connections.
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ctx.Pool(args.workers, initializer=_init_worker, initargs=(source_caps,)) as pool:
+            tasks = _tasks(_read_items(fin), args.embed_batch_size, args.full, args.embed_retries)
+            for out in pool.imap(_run_one, tasks):
+                fout.write(json.dumps(json_safe(out), default=str) + "\n")
+                fout.flush()
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+
+
+if __name__ == "__main__":
+    main()
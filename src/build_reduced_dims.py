@@ -0,0 +1,104 @@
+"""
+Build the reduced-dimension columns and HNSW indexes used by multi-stage
+retrieval (RETRIEVAL_STAGES in db.py) on a local pgvector instance.
+
+    python src/build_reduced_dims.py --dsn postgresql://localhost/theorems --dims 256 1024
+
+For each dimension d this adds embedding_<d> halfvec(d) to
+theorem_search_qwen8b, fills it in slogan_id batches with the leading d
+dimensions of embedding renormalized to unit length (Qwen3 embeddings are
+Matryoshka-trained, so the prefix is a usable embedding), and builds an HNSW
+cosine index on it. Already-filled rows are skipped, so the script can be
+rerun after new rows are loaded.
+"""
+import argparse
+import os
+import time
+
+import psycopg2
+
+TABLE = "theorem_search_qwen8b"
+# pgvector's HNSW index supports halfvec columns of at most 4000 dimensions.
+MAX_INDEX_DIMS = 4000
+
+
+def add_column(conn, dims):
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS embedding_{dims} halfvec({dims});")
+    conn.commit()
+
+
+def fill_column(conn, dims, batch_size):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT min(slogan_id), max(slogan_id) FROM {TABLE};")
+        lo, hi = cur.fetchone()
+    if lo is None:
+        return
+
+    t0 = time.time()
+    for start in range(lo, hi + 1, batch_size):
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE {TABLE}
+                SET embedding_{dims} = l2_normalize(subvector(embedding, 1, {dims}))::halfvec({dims})
+                WHERE slogan_id >= %s AND slogan_id < %s
+                  AND embedding_{dims} IS NULL;
+                """,
+                (start, start + batch_size),
+            )
+        conn.commit()
+        done = min(start + batch_size, hi + 1) - lo
+        print(f"embedding_{dims}: {done}/{hi + 1 - lo} ids ({time.time() - t0:.0f}s)", flush=True)
+
+
+def build_index(conn, dims, m, ef_construction, maintenance_work_mem):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET maintenance_work_mem = %s;", (maintenance_work_mem,))
+            cur.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {TABLE}_embedding_{dims}_hnsw
+                ON {TABLE} USING hnsw (embedding_{dims} halfvec_cosine_ops)
+                WITH (m = %s, ef_construction = %s);
+                """,
+                (m, ef_construction),
+            )
+    finally:
+        conn.autocommit = False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build Matryoshka halfvec columns and indexes.")
+    parser.add_argument("--dsn", default=os.getenv("LOCAL_PG_DSN"), help="libpq connection string (default: $LOCAL_PG_DSN)")
+    parser.add_argument("--dims", type=int, nargs="+", required=True, help="dimensions to build, e.g. 256 1024")
+    parser.add_argument("--batch-size", type=int, default=50000, help="slogan_ids per UPDATE")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--maintenance-work-mem", default="4GB")
+    parser.add_argument("--skip-index", action="store_true", help="only add and fill the columns")
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        parser.error("--dsn or LOCAL_PG_DSN is required")
+    for dims in args.dims:
+        if not 0 < dims <= MAX_INDEX_DIMS:
+            parser.error(f"bad dimension {dims}: must be between 1 and {MAX_INDEX_DIMS}")
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        for dims in args.dims:
+            add_column(conn, dims)
+            fill_column(conn, dims, args.batch_size)
+            if not args.skip_index:
+                t0 = time.time()
+                build_index(conn, dims, args.m, args.ef_construction, args.maintenance_work_mem)
+                print(f"embedding_{dims}: index built ({time.time() - t0:.0f}s)", flush=True)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
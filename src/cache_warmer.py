@@ -0,0 +1,99 @@
+"""
+Keeps head queries warm. Mines the most frequent recent (query, filters)
+combinations from public.queries and precomputes their embeddings
+(cached_embed) and ranked results (search.results_cache), at startup and
+then every WARM_INTERVAL seconds.
+
+Off by default: set WARM_MAX_QUERIES > 0 to enable it. Each process warms
+its own caches, so with several app processes per host enable it only
+where the extra embedding calls and DB searches are affordable. Needs the
+public.queries.created_at column (sql/queries_created_at.sql).
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from concurrency import Overloaded
+from db import cached_embed, fetch_results, load_frequent_queries, load_source_caps
+from search import admission, build_filter_clauses, results_cache, search_key
+from utils import filters_from_json
+
+WARM_MAX_QUERIES = int(os.getenv("WARM_MAX_QUERIES", 0))
+WARM_TIME_BUDGET = float(os.getenv("WARM_TIME_BUDGET", 120))
+WARM_LOOKBACK_DAYS = int(os.getenv("WARM_LOOKBACK_DAYS", 30))
+WARM_INTERVAL = float(os.getenv("WARM_INTERVAL", 6 * 60 * 60))
+WARM_WORKERS = int(os.getenv("WARM_WORKERS", 4))
+
+
+def _warm_one(query, filters, source_caps):
+    key = search_key(query, filters)
+    if key in results_cache:
+        return False
+    query_vec = cached_embed(query)
+    where_clauses, where_params = build_filter_clauses(filters, source_caps)
+    # Warming competes with user searches for the same admission slots.
+    with admission.admit(slots=len(filters["sources"])):
+        results = fetch_results(
+            query_vec=query_vec,
+            citation_weight=filters["citation_weight"],
+            top_k=filters["top_k"],
+            selected_sources=filters["sources"],
+            filter_clauses=where_clauses,
+            filter_params=where_params,
+        )
+    results_cache.put(key, results)
+    return True
+
+
+def warm_caches(max_queries=WARM_MAX_QUERIES, time_budget=WARM_TIME_BUDGET):
+    """
+    Warm up to max_queries head queries, starting no new work once
+    time_budget seconds have passed. Returns the number of entries computed.
+    """
+    deadline = time.time() + time_budget
+    source_caps = load_source_caps()
+    entries = [
+        (query, filters_from_json(raw))
+        for query, raw in load_frequent_queries(max_queries, WARM_LOOKBACK_DAYS)
+        if raw and raw.get("sources")
+    ]
+
+    shed = threading.Event()
+
+    def task(entry):
+        if time.time() > deadline or shed.is_set():
+            return False
+        try:
+            return _warm_one(*entry, source_caps)
+        except Overloaded as e:
+            # User searches are queueing: give up this pass rather than
+            # keep competing with them for slots.
+            if not shed.is_set():
+                shed.set()
+                print(f"Cache warmer: pausing until the next pass, search was shed: {e}", flush=True)
+            return False
+        except Exception as e:
+            print(f"Cache warmer: {entry[0]!r} failed: {e}", flush=True)
+            return False
+
+    with ThreadPoolExecutor(max_workers=WARM_WORKERS) as pool:
+        return sum(pool.map(task, entries))
+
+
+def _run_forever():
+    while True:
+        t0 = time.time()
+        try:
+            n = warm_caches()
+            print(f"Cache warmer: {n} entries in {time.time() - t0:.1f}s", flush=True)
+        except Exception as e:
+            print(f"Cache warmer failed: {e}", flush=True)
+        time.sleep(WARM_INTERVAL)
+
+
+def start_cache_warmer():
+    """Warm now and then every WARM_INTERVAL seconds, in a daemon thread."""
+    thread = threading.Thread(target=_run_forever, name="cache-warmer", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """
+    Raised when a search is shed by the AdmissionController, either because
+    the queue was full or because it waited longer than the timeout.
+    """
+
+    def __init__(self, queue_depth, active, timed_out=False):
+        reason = "timed out waiting for a slot" if timed_out else "search queue is full"
+        super().__init__(f"{reason} ({active} running, {queue_depth} waiting)")
+        self.queue_depth = queue_depth
+        self.active = active
+        self.timed_out = timed_out
+
+
+class Admission:
+    """What a search saw when it was admitted."""
+    __slots__ = ("queue_depth", "waited")
+
+    def __init__(self, queue_depth, waited):
+        self.queue_depth = queue_depth  # searches queued ahead of it, this one included
+        self.waited = waited  # seconds spent queued
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs fn,
+    later callers wait for and share its result (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Return (result, shared); shared is True if another caller ran fn."""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+            if leader:
+                try:
+                    call.result = fn()
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        del self._calls[key]
+                    call.event.set()
+                return call.result, False
+
+            call.event.wait()
+            if call.error is None:
+                return call.result, True
+            if isinstance(call.error, Exception):
+                raise call.error
+            # The leader was interrupted (e.g. its session reran), not
+            # failed: run the call again, possibly as the new leader.
+
+
+class AdmissionController:
+    """
+    Caps concurrent DB queries on the search path. A search takes one slot
+    per query it runs at once (one per selected source), so max_concurrent
+    bounds the search connections open against the database, not the number
+    of searches. Searches that cannot get their slots wait, first come first
+    served, in a bounded queue for up to timeout seconds; beyond that they
+    are shed with Overloaded.
+    """
+
+    def __init__(self, max_concurrent, max_queue, timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queue = deque()
+        self._shed = 0
+
+    @property
+    def active(self):
+        """Slots in use."""
+        return self._active
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    @property
+    def shed(self):
+        """Searches turned away since startup."""
+        return self._shed
+
+    @contextmanager
+    def admit(self, slots=1, on_wait=None):
+        """
+        Hold slots (capped at max_concurrent) for the duration of the block,
+        yielding an Admission. If the search has to queue, on_wait(queue_depth)
+        is called first, e.g. to show a waiting status.
+        """
+        slots = max(1, min(slots, self.max_concurrent))
+        t0 = time.monotonic()
+        depth = 0
+        ticket = object()
+        with self._cond:
+            if not self._queue and self._active + slots <= self.max_concurrent:
+                self._active += slots
+            elif len(self._queue) >= self.max_queue:
+                self._shed += 1
+                raise Overloaded(len(self._queue), self._active)
+            else:
+                self._queue.append(ticket)
+                depth = len(self._queue)
+        if depth:
+            try:
+                if on_wait is not None:
+                    on_wait(depth)
+                with self._cond:
+                    admitted = self._cond.wait_for(
+                        lambda: self._queue[0] is ticket
+                        and self._active + slots <= self.max_concurrent,
+                        timeout=self.timeout,
+                    )
+                    if not admitted:
+                        self._shed += 1
+                        raise Overloaded(len(self._queue) - 1, self._active, timed_out=True)
+                    self._active += slots
+            finally:
+                with self._cond:
+                    self._queue.remove(ticket)
+                    self._cond.notify_all()
+        try:
+            yield Admission(depth, time.monotonic() - t0)
+        finally:
+            with self._cond:
+                self._active -= slots
+                self._cond.notify_all()
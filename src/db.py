@@ -1,53 +1,90 @@
 import streamlit as st
 import json
 import os
-import boto3
+import re
+import threading
 import psycopg2
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 from pgvector.psycopg2 import register_vector
 from dotenv import load_dotenv
 from utils import json_safe
-from openai import OpenAI
-from psycopg2.pool import SimpleConnectionPool
+from records import RESULT_COLUMNS, ResultRow
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 
 load_dotenv()
 
-_openai_client = OpenAI(
-    base_url="https://api.tokenfactory.nebius.com/v1/",
-    api_key=os.environ.get("NEBIUS_API_KEY"),
-)
-
 _region = os.getenv("AWS_REGION")
 _secret_arn = os.getenv("RDS_SECRET_ARN")
 _dbname = os.getenv("RDS_DB_NAME")
-_sm_client = boto3.client("secretsmanager", region_name=_region)
 _host = os.getenv("RDS_WRITER_HOST")
+
+# Clients and the DB secret are created on first use (or by warmup.warm_up),
+# so importing this module does no network or SDK setup.
+_init_lock = threading.RLock()
+_openai_client = None
+_sm_client = None
 _secret_dict = None
 
+def _get_openai_client():
+    global _openai_client
+    with _init_lock:
+        if _openai_client is None:
+            from openai import OpenAI
+            _openai_client = OpenAI(
+                base_url="https://api.tokenfactory.nebius.com/v1/",
+                api_key=os.environ.get("NEBIUS_API_KEY"),
+            )
+        return _openai_client
+
+def _get_sm_client():
+    global _sm_client
+    with _init_lock:
+        if _sm_client is None:
+            import boto3
+            _sm_client = boto3.client("secretsmanager", region_name=_region)
+        return _sm_client
+
 def _refresh_secret():
     global _secret_dict
-    secret_value = _sm_client.get_secret_value(SecretId=_secret_arn)
-    _secret_dict = json.loads(secret_value["SecretString"])
-    return _secret_dict
+    with _init_lock:
+        secret_value = _get_sm_client().get_secret_value(SecretId=_secret_arn)
+        _secret_dict = json.loads(secret_value["SecretString"])
+        return _secret_dict
 
 def _get_secret():
-    if _secret_dict is None:
-        _refresh_secret()
-    return _secret_dict
+    with _init_lock:
+        if _secret_dict is None:
+            _refresh_secret()
+        return _secret_dict
 
 def embed_query(query: str):
-    response = _openai_client.embeddings.create(
+    response = _get_openai_client().embeddings.create(
         model="Qwen/Qwen3-Embedding-8B",
         input=query
     )
     return response.data[0].embedding
 
+def embed_queries(queries: list):
+    response = _get_openai_client().embeddings.create(
+        model="Qwen/Qwen3-Embedding-8B",
+        input=queries
+    )
+    return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
 @st.cache_data(ttl=60*60*24*7)
 def cached_embed(query):
     return embed_query(query)
 
-def _open_conn(secret):
-    return psycopg2.connect(
+# psycopg2 pools keep at most minconn connections idle and close any other
+# connection when it is returned, so minconn is the number reused across
+# searches, not merely a lower bound.
+_pool_min_conn = int(os.getenv("DB_POOL_MIN_CONN", 4))
+_pool_max_conn = int(os.getenv("DB_POOL_MAX_CONN", 10))
+_pool = None
+
+def _conn_kwargs(secret):
+    return dict(
         host=_host,
         port=int(secret.get("port", 5432)),
         dbname=_dbname or secret.get("dbname"),
@@ -56,54 +93,222 @@ def _open_conn(secret):
         sslmode="require",
     )
 
-@contextmanager
-def writer_conn():
+def _open_conn(secret):
+    conn = psycopg2.connect(**_conn_kwargs(secret))
+    register_vector(conn)
+    conn.commit()
+    return conn
+
+class _VectorConnectionPool(ThreadedConnectionPool):
+    _retired = False
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        register_vector(conn)
+        conn.commit()
+        return conn
+
+    def retire(self):
+        """Close the idle connections now and each checked-out one as it is returned."""
+        with self._lock:
+            self._retired = True
+            for conn in self._pool:
+                conn.close()
+            self._pool = []
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close=close or self._retired)
+
+def _get_pool(secret):
+    global _pool
+    with _init_lock:
+        if _pool is None:
+            _pool = _VectorConnectionPool(
+                min(_pool_min_conn, _pool_max_conn), _pool_max_conn, **_conn_kwargs(secret)
+            )
+        return _pool
+
+def prewarm_pool():
+    """
+    Create the pool, which opens its DB_POOL_MIN_CONN connections, ahead of
+    the first search. Returns the number of idle connections.
+    """
+    pool = _get_pool(_get_secret())
+    with pool._lock:
+        return len(pool._pool)
+
+def _rotate_pool():
+    """
+    Swap in a new pool on the next _get_pool. Connections other threads
+    still hold from the old one stay usable and are closed when returned.
+    """
+    global _pool
+    with _init_lock:
+        if _pool is not None:
+            _pool.retire()
+        _pool = None
+
+def _acquire_conn():
+    """Return (conn, pool); pool is None for an overflow connection."""
     secret = _get_secret()
     try:
-        conn = _open_conn(secret)
+        pool = _get_pool(secret)
+        try:
+            return pool.getconn(), pool
+        except PoolError:
+            # Pool exhausted: fall back to a dedicated connection.
+            return _open_conn(secret), None
     except psycopg2.OperationalError as e:
-        if "authentication failed" in str(e).lower():
-            conn = _open_conn(_refresh_secret())
-        else:
+        if "authentication failed" not in str(e).lower():
             raise
+        _rotate_pool()
+        pool = _get_pool(_refresh_secret())
+        return pool.getconn(), pool
+
+@contextmanager
+def writer_conn():
+    """
+    A pooled connection whose transaction is committed when the block exits
+    normally and rolled back if it raises, so it is idle when returned.
+    """
+    conn, pool = _acquire_conn()
     try:
-        register_vector(conn)
         yield conn
+        conn.commit()
+    except Exception:
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                conn.close()
+        raise
     finally:
-        conn.close()
+        if pool is None:
+            conn.close()
+        else:
+            pool.putconn(conn, close=bool(conn.closed))
+
+# Sidebar metadata, read either per item (load_*, cached per process) or all
+# at once (fetch_metadata, for shared_meta).
+_SOURCES_SQL = "SELECT sources FROM mv_sources;"
+_SOURCE_CAPS_SQL = "SELECT source, has_metadata FROM mv_source_caps;"
+_AUTHORS_SQL = "SELECT source, authors FROM mv_authors_by_source;"
+_TAGS_SQL = "SELECT source, tags FROM mv_tags_by_source;"
+_THEOREM_COUNT_SQL = "SELECT cnt FROM mv_theorem_count;"
+
+def _read_sources(cur):
+    cur.execute(_SOURCES_SQL)
+    return cur.fetchone()[0] or []
+
+def _read_source_caps(cur):
+    cur.execute(_SOURCE_CAPS_SQL)
+    return {row[0]: {"has_metadata": row[1]} for row in cur.fetchall()}
+
+def _read_authors(cur):
+    cur.execute(_AUTHORS_SQL)
+    return {row[0]: row[1] for row in cur.fetchall()}
+
+def _read_tags(cur):
+    cur.execute(_TAGS_SQL)
+    return {row[0]: row[1] for row in cur.fetchall()}
+
+def _read_theorem_count(cur):
+    cur.execute(_THEOREM_COUNT_SQL)
+    return cur.fetchone()[0]
+
+_METADATA_READERS = {
+    "sources": _read_sources,
+    "source_caps": _read_source_caps,
+    "authors": _read_authors,
+    "tags": _read_tags,
+    "theorem_count": _read_theorem_count,
+}
 
 @st.cache_data(ttl=60*60*24*7)
 def load_sources():
     with writer_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT sources FROM mv_sources;")
-        return cur.fetchone()[0] or []
+        return _read_sources(cur)
 
 @st.cache_data(ttl=60*60*24*7)
 def load_source_caps():
     with writer_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT source, has_metadata FROM mv_source_caps;")
-        return {row[0]: {"has_metadata": row[1]} for row in cur.fetchall()}
+        return _read_source_caps(cur)
 
 @st.cache_data(ttl=60*60*24*7)
 def load_authors():
     with writer_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT source, authors FROM mv_authors_by_source;")
-        return {row[0]: row[1] for row in cur.fetchall()}
+        return _read_authors(cur)
 
 @st.cache_data(ttl=60*60*24*7)
 def load_tags():
     with writer_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT source, tags FROM mv_tags_by_source;")
-        return {row[0]: row[1] for row in cur.fetchall()}
+        return _read_tags(cur)
 
 @st.cache_data(ttl=60*60*24*7)
 def load_theorem_count():
     with writer_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT cnt FROM mv_theorem_count;")
-        return cur.fetchone()[0]
+        return _read_theorem_count(cur)
+
+def fetch_metadata():
+    """Uncached sidebar metadata on one connection, for shared_meta."""
+    with writer_conn() as conn, conn.cursor() as cur:
+        return {name: read(cur) for name, read in _METADATA_READERS.items()}
+
+# Past this many matches the title filter is not selective enough to be worth
+# passing as an id list, and run_search falls back to the ILIKE clause.
+PAPER_TITLE_MATCH_LIMIT = 10000
+
+_PAPER_TITLES_SQL = """
+SELECT DISTINCT paper_id
+FROM mv_paper_titles
+WHERE title ILIKE ANY(%(title_patterns)s)
+LIMIT %(limit)s;
+"""
+
+def _paper_titles_params(titles):
+    return {
+        "title_patterns": [f"%{t}%" for t in titles],
+        "limit": PAPER_TITLE_MATCH_LIMIT + 1,
+    }
+
+def _paper_ids_or_none(rows):
+    paper_ids = [row[0] for row in rows]
+    if len(paper_ids) > PAPER_TITLE_MATCH_LIMIT:
+        return None
+    return paper_ids
+
+@st.cache_data(ttl=60*60*24*7)
+def resolve_paper_titles(titles: tuple):
+    """
+    Resolve title substrings to the paper_ids whose title contains any of them,
+    via the trigram index on mv_paper_titles. Returns None when the match set
+    exceeds PAPER_TITLE_MATCH_LIMIT.
+    """
+    if not titles:
+        return []
+    with writer_conn() as conn, conn.cursor() as cur:
+        cur.execute(_PAPER_TITLES_SQL, _paper_titles_params(titles))
+        return _paper_ids_or_none(cur.fetchall())
 
-def row_to_dict(cursor, row):
-    return {desc[0]: row[i] for i, desc in enumerate(cursor.description)}
+@st.cache_data(ttl=60*60, max_entries=2000)
+def load_theorem_body(slogan_id):
+    with writer_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT theorem_body FROM theorem_search_qwen8b WHERE slogan_id = %s;",
+            (slogan_id,),
+        )
+        row = cur.fetchone()
+        return row[0] if row else None
+
+@st.cache_data(ttl=60*60, max_entries=500)
+def load_theorem_bodies(slogan_ids: tuple):
+    """{slogan_id: theorem_body} for several results in one round trip."""
+    with writer_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT slogan_id, theorem_body FROM theorem_search_qwen8b WHERE slogan_id = ANY(%(ids)s);",
+            {"ids": list(slogan_ids)},
+        )
+        return dict(cur.fetchall())
 
 def insert_feedback(payload: dict):
     with writer_conn() as conn:
@@ -159,6 +364,186 @@ def insert_query(query: str, filters: dict):
                 ),
             )
 
+def load_frequent_queries(limit: int, lookback_days: int):
+    """
+    Most frequent (query, filters) combinations logged by insert_query in the
+    last lookback_days, most recent first among equally frequent ones.
+    """
+    with writer_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT query, filters::text, count(*) AS n, max(created_at) AS last_seen
+            FROM public.queries
+            WHERE created_at > now() - make_interval(days => %(days)s)
+              AND query <> ''
+            GROUP BY query, filters::text
+            ORDER BY n DESC, last_seen DESC
+            LIMIT %(limit)s;
+            """,
+            {"days": lookback_days, "limit": limit},
+        )
+        return [(row[0], json.loads(row[1])) for row in cur.fetchall()]
+
+_FULL_ROWS_SQL = f"""
+SELECT
+    {", ".join(RESULT_COLUMNS)}
+FROM theorem_search_qwen8b
+WHERE slogan_id = ANY(%(ids)s)
+ORDER BY array_position(%(ids)s, slogan_id);
+"""
+
+# pgvector's HNSW index supports halfvec columns of at most 4000 dimensions
+# (build_reduced_dims.MAX_INDEX_DIMS).
+_MAX_STAGE_DIMS = 4000
+
+def _parse_stages(spec):
+    """
+    Parse RETRIEVAL_STAGES, e.g. "256:20,1024:4": a comma-separated list of
+    <kind>:<pool multiplier> stages, each keeping top_k * multiplier rows of
+    the previous one. kind is "bit" (Hamming distance on the binary-quantized
+    embedding) or a Matryoshka dimension d (cosine on the embedding_<d>
+    halfvec column built by build_reduced_dims.py). The first stage is the
+    ANN scan; the last pool is rescored at full precision.
+    """
+    parts = [p.strip() for p in (spec or "").split(",") if p.strip()]
+    if not parts:
+        raise ValueError("RETRIEVAL_STAGES: at least one stage is required")
+    stages = []
+    for part in parts:
+        match = re.fullmatch(r"(bit|\d+):(\d+)", part)
+        if not match:
+            raise ValueError(f"RETRIEVAL_STAGES: bad stage {part!r}, expected <bit|dims>:<multiplier>")
+        kind, multiplier = match.group(1), int(match.group(2))
+        if kind != "bit":
+            kind = int(kind)
+            if not 0 < kind <= _MAX_STAGE_DIMS:
+                raise ValueError(f"RETRIEVAL_STAGES: bad dimension {kind}, must be 1..{_MAX_STAGE_DIMS}")
+        if multiplier < 1:
+            raise ValueError(f"RETRIEVAL_STAGES: bad multiplier in {part!r}")
+        stages.append((kind, multiplier))
+    return stages
+
+RETRIEVAL_STAGES = _parse_stages(os.getenv("RETRIEVAL_STAGES", "bit:3"))
+
+def _stage_distance(kind):
+    if kind == "bit":
+        return """
+            (binary_quantize(embedding)::bit(4096))
+            <~>
+            binary_quantize(%(query_vec_ann)s::vector(4096))::bit(4096)"""
+    return f"""
+            embedding_{kind} <=> %(query_vec_{kind})s::halfvec({kind})"""
+
+def _candidate_sql(extra_where, stages=RETRIEVAL_STAGES):
+    reduced_columns = "".join(
+        f",\n            embedding_{kind}"
+        for kind in dict.fromkeys(k for k, _ in stages[1:])
+        if kind != "bit"
+    )
+    ctes = [f"""
+    stage0 AS (
+        SELECT
+            slogan_id,
+            citations,
+            embedding{reduced_columns}
+        FROM theorem_search_qwen8b
+        WHERE source = %(source)s{extra_where}
+        ORDER BY{_stage_distance(stages[0][0])}
+        LIMIT %(stage0_limit)s
+    )"""]
+    for i, (kind, _) in enumerate(stages[1:], 1):
+        ctes.append(f"""
+    stage{i} AS (
+        SELECT *
+        FROM stage{i - 1}
+        ORDER BY{_stage_distance(kind)}
+        LIMIT %(stage{i}_limit)s
+    )""")
+    return f"""
+    WITH{",".join(ctes)}
+    SELECT
+        slogan_id,
+        (1.0 - (embedding <=> %(query_vec_rerank)s::vector(4096))) AS similarity,
+        (1.0 - (embedding <=> %(query_vec_rerank)s::vector(4096)))
+        + %(citation_weight)s * CASE
+            WHEN citations > 0 THEN ln(citations::float)
+            ELSE 0
+          END AS score
+    FROM stage{len(stages) - 1};
+    """
+
+def _truncate_vec(query_vec, dims):
+    # Matryoshka truncation: leading dims, renormalized to unit length.
+    head = list(query_vec[:dims])
+    norm = sum(x * x for x in head) ** 0.5 or 1.0
+    return [x / norm for x in head]
+
+# set_config(..., true) is SET LOCAL, but takes bind parameters under both
+# psycopg2 and the server-side binding of psycopg 3 (used by api.py).
+_SEARCH_PARAMS_SQL = """
+SELECT
+    set_config('hnsw.ef_search', %(ef_search)s, true),
+    set_config('hnsw.iterative_scan', 'relaxed_order', true);
+"""
+
+# pgvector rejects hnsw.ef_search above 1000.
+_MAX_EF_SEARCH = 1000
+
+def _search_params(top_k, stages=RETRIEVAL_STAGES):
+    # Size the HNSW candidate list for the first-stage pool, up to pgvector's
+    # limit; iterative_scan keeps walking the graph for larger LIMITs.
+    ef_search = min(_MAX_EF_SEARCH, max(80, top_k * 4, top_k * stages[0][1]))
+    return {"ef_search": str(ef_search)}
+
+def _set_search_params(cur, top_k):
+    cur.execute(_SEARCH_PARAMS_SQL, _search_params(top_k))
+
+def _candidate_params(
+    source,
+    query_vec,
+    citation_weight,
+    top_k,
+    filter_params,
+    stages=RETRIEVAL_STAGES,
+):
+    params = {
+        "source": source,
+        "query_vec_ann": query_vec,
+        "query_vec_rerank": query_vec,
+        "citation_weight": citation_weight,
+        **filter_params,
+    }
+    for i, (kind, multiplier) in enumerate(stages):
+        params[f"stage{i}_limit"] = top_k * multiplier
+        if kind != "bit":
+            params[f"query_vec_{kind}"] = _truncate_vec(query_vec, kind)
+    return params
+
+def _fetch_source_candidates(
+    cur,
+    source,
+    query_vec,
+    citation_weight,
+    top_k,
+    extra_where,
+    filter_params,
+):
+    cur.execute(
+        _candidate_sql(extra_where),
+        _candidate_params(source, query_vec, citation_weight, top_k, filter_params),
+    )
+    return cur.fetchall()
+
+def _rank_candidates(rows, top_k):
+    # Global rerank across sources. The sort is stable, so ties keep source
+    # order, which is what keeps the streamed and batch orderings identical.
+    return sorted(rows, key=lambda x: x[2], reverse=True)[:top_k]
+
+def _extra_where(filter_clauses):
+    if not filter_clauses:
+        return ""
+    return " AND " + " AND ".join(filter_clauses)
+
 def fetch_candidate_ids(
     query_vec,
     citation_weight,
@@ -170,108 +555,73 @@ def fetch_candidate_ids(
     if not selected_sources:
         return []
 
-    extra_where = ""
-    if filter_clauses:
-        extra_where = " AND " + " AND ".join(filter_clauses)
+    extra_where = _extra_where(filter_clauses)
 
     with writer_conn() as conn, conn.cursor() as cur:
-        per_source_multiplier = 3
-        ef_search = max(80, top_k * 4)
-
-        cur.execute("SET LOCAL hnsw.ef_search = %s;", (ef_search,))
-        cur.execute("SET LOCAL hnsw.iterative_scan = 'relaxed_order';")
+        _set_search_params(cur, top_k)
 
         all_rows = []
 
         for source in selected_sources:
-            sql = f"""
-            WITH ann AS (
-                SELECT
-                    slogan_id,
-                    citations,
-                    embedding
-                FROM theorem_search_qwen8b
-                WHERE source = %(source)s{extra_where}
-                ORDER BY
-                    (binary_quantize(embedding)::bit(4096))
-                    <~>
-                    binary_quantize(%(query_vec_ann)s::vector(4096))::bit(4096)
-                LIMIT %(per_source_limit)s
-            )
-            SELECT
-                slogan_id,
-                (1.0 - (embedding <=> %(query_vec_rerank)s::vector(4096))) AS similarity,
-                (1.0 - (embedding <=> %(query_vec_rerank)s::vector(4096)))
-                + %(citation_weight)s * CASE
-                    WHEN citations > 0 THEN ln(citations::float)
-                    ELSE 0
-                  END AS score
-            FROM ann;
-            """
-
-            params = {
-                "source": source,
-                "query_vec_ann": query_vec,
-                "query_vec_rerank": query_vec,
-                "citation_weight": citation_weight,
-                "per_source_limit": top_k * per_source_multiplier,
-                **filter_params,
-            }
-
-            cur.execute(sql, params)
-            all_rows.extend(cur.fetchall())
+            all_rows.extend(_fetch_source_candidates(
+                cur,
+                source,
+                query_vec,
+                citation_weight,
+                top_k,
+                extra_where,
+                filter_params,
+            ))
 
         if not all_rows:
             return []
 
-        # Global rerank across sources
-        all_rows.sort(key=lambda x: x[2], reverse=True)
+        return _rank_candidates(all_rows, top_k)
+
+def _hydrate(cur, slogan_rows):
+    slogan_ids = [r[0] for r in slogan_rows]
+    score_map = {r[0]: (r[1], r[2]) for r in slogan_rows}
+
+    cur.execute(_FULL_ROWS_SQL, {"ids": slogan_ids})
+    rows = cur.fetchall()
 
-        return all_rows[:top_k]
+    return [ResultRow(row, *score_map[row[0]]) for row in rows]
 
 def fetch_full_rows(slogan_rows):
     if not slogan_rows:
         return []
 
-    slogan_ids = [r[0] for r in slogan_rows]
-    score_map = {r[0]: (r[1], r[2]) for r in slogan_rows}
-
     with writer_conn() as conn, conn.cursor() as cur:
-        sql = """
-        SELECT
-            slogan_id,
-            theorem_id,
-            paper_id,
-            theorem_name,
-            theorem_body,
-            theorem_slogan,
-            theorem_type,
-            title,
-            authors,
-            link,
-            year,
-            journal_published,
-            primary_category,
-            categories,
-            citations,
-            source,
-            has_metadata
-        FROM theorem_search_qwen8b
-        WHERE slogan_id = ANY(%(ids)s)
-        ORDER BY array_position(%(ids)s, slogan_id);
-        """
+        return _hydrate(cur, slogan_rows)
 
-        cur.execute(sql, {"ids": slogan_ids})
-        rows = cur.fetchall()
+def fetch_named_theorems():
+    with writer_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT name, slogan_id FROM mv_named_theorems;")
+        return cur.fetchall()
+
+def fetch_rows_by_ids(slogan_ids, selected_sources, filter_clauses, filter_params):
+    """
+    Hydrate slogan_ids in the given order, keeping only rows that match the
+    sources and filters. Rows carry no similarity or score.
+    """
+    if not slogan_ids or not selected_sources:
+        return []
 
-    return [
-        {
-            **row_to_dict(cur, row),
-            "similarity": score_map[row[0]][0],
-            "score": score_map[row[0]][1],
-        }
-        for row in rows
-    ]
+    sql = f"""
+    SELECT
+        {", ".join(RESULT_COLUMNS)}
+    FROM theorem_search_qwen8b
+    WHERE slogan_id = ANY(%(ids)s)
+      AND source = ANY(%(sources)s){_extra_where(filter_clauses)}
+    ORDER BY array_position(%(ids)s, slogan_id);
+    """
+    with writer_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, {
+            **filter_params,
+            "ids": list(slogan_ids),
+            "sources": list(selected_sources),
+        })
+        return [ResultRow(row, None, None) for row in cur.fetchall()]
 
 def fetch_results(
     query_vec,
@@ -291,3 +641,71 @@ def fetch_results(
     )
 
     return fetch_full_rows(candidates)
+
+def _fetch_source_results(
+    source,
+    query_vec,
+    citation_weight,
+    top_k,
+    extra_where,
+    filter_params,
+):
+    with writer_conn() as conn, conn.cursor() as cur:
+        _set_search_params(cur, top_k)
+        rows = _fetch_source_candidates(
+            cur,
+            source,
+            query_vec,
+            citation_weight,
+            top_k,
+            extra_where,
+            filter_params,
+        )
+        # Only a source's own top_k can make it into the global top_k.
+        top = _rank_candidates(rows, top_k)
+        return rows, (_hydrate(cur, top) if top else [])
+
+def iter_results(
+    query_vec,
+    citation_weight,
+    top_k,
+    selected_sources,
+    filter_clauses,
+    filter_params,
+):
+    """
+    Streaming counterpart of fetch_results. Sources are searched concurrently
+    and, each time one completes, the current global top_k is yielded. The
+    last value yielded is ordered exactly as fetch_results would return it.
+    """
+    if not selected_sources:
+        yield []
+        return
+
+    extra_where = _extra_where(filter_clauses)
+    rows_by_source = {}
+    full_rows = {}
+
+    with ThreadPoolExecutor(max_workers=len(selected_sources)) as pool:
+        futures = {
+            pool.submit(
+                _fetch_source_results,
+                source,
+                query_vec,
+                citation_weight,
+                top_k,
+                extra_where,
+                filter_params,
+            ): source
+            for source in selected_sources
+        }
+        for future in as_completed(futures):
+            rows, hydrated = future.result()
+            rows_by_source[futures[future]] = rows
+            full_rows.update((r["slogan_id"], r) for r in hydrated)
+
+            ranked = _rank_candidates(
+                [r for s in selected_sources for r in rows_by_source.get(s, [])],
+                top_k,
+            )
+            yield [full_rows[r[0]] for r in ranked if r[0] in full_rows]
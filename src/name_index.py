@@ -0,0 +1,152 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from db import fetch_named_theorems
+
+# "seed": show name matches at once and put them ahead of the semantic results.
+# "direct": answer confident name matches without embedding the query.
+# "off": always run the embedding search alone.
+NAME_FAST_PATH = os.getenv("NAME_FAST_PATH", "seed")
+NAME_INDEX_TTL = int(os.getenv("NAME_INDEX_TTL", 60*60*24*7))
+
+# Longer queries are descriptions, not names.
+_MAX_QUERY_WORDS = 6
+_MIN_PREFIX_CHARS = 4
+
+_DASHES = dict.fromkeys(map(ord, "-‐‑‒–—―−"), " ")
+_APOSTROPHES = dict.fromkeys(map(ord, "’‘`´"), "'")
+
+
+def normalize_name(s: str) -> str:
+    """
+    Canonical form for name matching: accents, case, dashes, apostrophe
+    variants, possessives and a leading "the" are ignored.
+    e.g. "The Hahn–Banach Theorem" -> "hahn banach theorem",
+         "Nakayama’s lemma" -> "nakayama lemma"
+    """
+    s = unicodedata.normalize("NFKD", s or "")
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    s = s.translate(_DASHES).translate(_APOSTROPHES).casefold()
+    s = re.sub(r"'s\b", "", s)
+    s = re.sub(r"[^\w\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return re.sub(r"^the ", "", s)
+
+
+class NameIndex:
+    """
+    In-memory exact and prefix index from normalized theorem names to
+    slogan_ids, built from mv_named_theorems rows of (name, slogan_id).
+    """
+
+    def __init__(self, rows):
+        by_name = {}
+        for name, slogan_id in rows:
+            key = normalize_name(name)
+            if key:
+                ids = by_name.setdefault(key, [])
+                if slogan_id not in ids:
+                    ids.append(slogan_id)
+        self._by_name = by_name
+        self._names = sorted(by_name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def lookup(self, query: str):
+        """
+        Return the slogan_ids for a confident match, else []. A match is
+        confident if the normalized query is a known name, or a word-boundary
+        prefix of exactly one known name ("hahn-banach" -> "hahn banach theorem").
+        """
+        key = normalize_name(query)
+        if not key or len(key.split()) > _MAX_QUERY_WORDS:
+            return []
+        if key in self._by_name:
+            return self._by_name[key]
+        if len(key) < _MIN_PREFIX_CHARS:
+            return []
+
+        i = bisect_left(self._names, key)
+        completions = []
+        while i < len(self._names) and self._names[i].startswith(key):
+            if self._names[i][len(key)] == " ":
+                completions.append(self._names[i])
+                if len(completions) > 1:
+                    return []
+            i += 1
+        return self._by_name[completions[0]] if completions else []
+
+
+_BUILD_RETRY_MIN = 30
+_BUILD_RETRY_MAX = 60*60
+
+_index = None
+_built_at = 0.0
+_build_lock = threading.Lock()
+_next_attempt_at = 0.0
+_retry_delay = _BUILD_RETRY_MIN
+_start_lock = threading.Lock()
+_rebuild_thread = None
+
+
+def _build_due(now):
+    if _index is None:
+        return now >= _next_attempt_at
+    return now - _built_at > NAME_INDEX_TTL
+
+
+def build_name_index():
+    """
+    (Re)build this process's name index from mv_named_theorems. A failure
+    schedules the next background attempt with exponential backoff.
+    """
+    global _index, _built_at, _next_attempt_at, _retry_delay
+    with _build_lock:
+        try:
+            index = NameIndex(fetch_named_theorems())
+        except Exception:
+            _next_attempt_at = time.time() + _retry_delay
+            _retry_delay = min(_retry_delay * 2, _BUILD_RETRY_MAX)
+            raise
+        _index, _built_at = index, time.time()
+        _retry_delay = _BUILD_RETRY_MIN
+        return index
+
+
+def _build_in_background():
+    with _build_lock:
+        # Another thread (e.g. warm-up) may have built it while this one waited.
+        if not _build_due(time.time()):
+            return
+    try:
+        build_name_index()
+    except Exception as e:
+        print(f"Name index build failed, retrying in {_next_attempt_at - time.time():.0f}s: {e}", flush=True)
+
+
+def current_name_index():
+    """
+    This process's name index, or None until a build has succeeded. While
+    there is none, a failed build is retried in the background with backoff;
+    once older than NAME_INDEX_TTL the old index keeps serving while a
+    rebuild runs.
+    """
+    global _rebuild_thread
+    if _build_due(time.time()):
+        with _start_lock:
+            if _rebuild_thread is None or not _rebuild_thread.is_alive():
+                _rebuild_thread = threading.Thread(target=_build_in_background, daemon=True)
+                _rebuild_thread.start()
+    return _index
+
+
+def merge_name_hits(name_hits, results, top_k):
+    """Name matches first, then the remaining search results, up to top_k."""
+    seen = {r["slogan_id"] for r in name_hits}
+    merged = list(name_hits) + [r for r in results if r["slogan_id"] not in seen]
+    return merged[:top_k]
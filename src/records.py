@@ -0,0 +1,100 @@
+import os
+
+# Column schema shared by every hydrated result row, in SELECT order.
+RESULT_COLUMNS = (
+    "slogan_id",
+    "theorem_id",
+    "paper_id",
+    "theorem_name",
+    "theorem_body",
+    "theorem_slogan",
+    "theorem_type",
+    "title",
+    "authors",
+    "link",
+    "year",
+    "journal_published",
+    "primary_category",
+    "categories",
+    "citations",
+    "source",
+    "has_metadata",
+)
+
+_COLUMN_INDEX = {name: i for i, name in enumerate(RESULT_COLUMNS)}
+_BODY_INDEX = _COLUMN_INDEX["theorem_body"]
+
+
+def session_results_max_bytes():
+    # Approximate bytes of search results a single session may keep in
+    # st.session_state. Read at call time, as .env is loaded by db.py.
+    return int(os.getenv("SESSION_RESULTS_MAX_BYTES", 256 * 1024))
+
+
+class ResultRow:
+    """
+    A hydrated search result backed by the raw DB tuple. Supports the
+    r["column"] access the UI uses without a per-row dict.
+    """
+    __slots__ = ("values", "similarity", "score")
+
+    def __init__(self, values, similarity, score):
+        self.values = values
+        self.similarity = similarity
+        self.score = score
+
+    def __getitem__(self, key):
+        if key == "similarity":
+            return self.similarity
+        if key == "score":
+            return self.score
+        return self.values[_COLUMN_INDEX[key]]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {
+            **dict(zip(RESULT_COLUMNS, self.values)),
+            "similarity": self.similarity,
+            "score": self.score,
+        }
+
+    def has_body(self):
+        return self.values[_BODY_INDEX] is not None
+
+    def without_body(self):
+        values = list(self.values)
+        values[_BODY_INDEX] = None
+        return ResultRow(tuple(values), self.similarity, self.score)
+
+    def approx_size(self):
+        """UTF-8 bytes of the row's text fields."""
+        size = 0
+        for v in self.values:
+            if isinstance(v, str):
+                size += len(v.encode("utf-8"))
+            elif isinstance(v, (list, tuple)):
+                size += sum(len(x.encode("utf-8")) for x in v if isinstance(x, str))
+        return size
+
+
+def fit_to_budget(rows, budget=None):
+    """
+    Keep rows in rank order, dropping theorem bodies once the budget is spent.
+    Dropped bodies are re-fetched, in one query per page, when rendered.
+    """
+    if budget is None:
+        budget = session_results_max_bytes()
+    out, used = [], 0
+    for r in rows:
+        size = r.approx_size()
+        if used + size > budget and r.has_body():
+            r = r.without_body()
+            size = r.approx_size()
+        used += size
+        out.append(r)
+    return out
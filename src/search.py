@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from concurrency import AdmissionController, SingleFlight
+from db import cached_embed, resolve_paper_titles
+from utils import json_safe, metadata_sources
+
+
+def _admitted_resolve_titles(titles):
+    """resolve_paper_titles, holding an admission slot while it queries."""
+    if not titles:
+        return []
+    with admission.admit():
+        return resolve_paper_titles(titles)
+
+
+def build_filter_clauses(filters: dict, source_caps: dict, resolve_titles=_admitted_resolve_titles):
+    """
+    Translate the sidebar filters into SQL WHERE clauses and their parameters
+    for fetch_results. Metadata filters only apply when a selected source
+    has metadata. resolve_titles maps a sorted tuple of title substrings to
+    paper_ids (or None); callers that resolve them elsewhere can pass their own.
+    """
+    selected_sources = filters["sources"]
+    where_clauses = []
+    where_params = {}
+
+    meta_sources = metadata_sources(selected_sources, source_caps)
+
+    if filters["types"]:
+        where_clauses.append("theorem_type = ANY(%(types)s)")
+        where_params["types"] = filters["types"]
+
+    if meta_sources:
+        if filters["authors"]:
+            where_clauses.append("authors && %(authors)s")
+            where_params["authors"] = filters["authors"]
+
+        if filters["tags"]:
+            where_clauses.append("primary_category = ANY(%(tags)s)")
+            where_params["tags"] = filters["tags"]
+
+        if filters["year_range"]:
+            y0, y1 = filters["year_range"]
+            where_clauses.append("year BETWEEN %(year_min)s AND %(year_max)s")
+            where_params["year_min"] = y0
+            where_params["year_max"] = y1
+
+        if filters["journal_status"] != "All":
+            where_clauses.append("journal_published = %(is_journal)s")
+            where_params["is_journal"] = filters["journal_status"] == "Journal Article"
+
+        low, high = filters["citation_range"]
+        if filters["include_unknown_citations"]:
+            where_clauses.append(
+                "(citations BETWEEN %(cite_low)s AND %(cite_high)s OR citations IS NULL)"
+            )
+        else:
+            where_clauses.append("citations BETWEEN %(cite_low)s AND %(cite_high)s")
+
+        where_params["cite_low"] = low
+        where_params["cite_high"] = high
+
+        pf = filters.get("paper_filter", {"ids": set(), "titles": set()})
+        id_patterns = [f"{i}%" for i in pf["ids"]]
+
+        or_clauses = []
+
+        if id_patterns:
+            or_clauses.append("paper_id LIKE ANY(%(paper_id_patterns)s)")
+            where_params["paper_id_patterns"] = id_patterns
+
+        if pf["titles"]:
+            title_paper_ids = resolve_titles(tuple(sorted(pf["titles"])))
+            if title_paper_ids is None:
+                or_clauses.append("title ILIKE ANY(%(title_patterns)s)")
+                where_params["title_patterns"] = [f"%{t}%" for t in pf["titles"]]
+            else:
+                or_clauses.append("paper_id = ANY(%(title_paper_ids)s)")
+                where_params["title_paper_ids"] = title_paper_ids
+
+        if or_clauses:
+            where_clauses.append("(" + " OR ".join(or_clauses) + ")")
+
+    return where_clauses, where_params
+
+
+def search_key(query: str, filters: dict) -> str:
+    """Canonical cache key for a query and its sidebar filters."""
+    return json.dumps([query, json_safe(filters)], sort_keys=True)
+
+
+class ResultsCache:
+    """
+    Process-wide LRU of ranked search results keyed by search_key, shared by
+    all sessions and filled both by searches and by the cache warmer. Rows
+    are stored without theorem bodies, which are the bulk of a row and are
+    batch-fetched when the results are rendered.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def put(self, key, results):
+        results = [r.without_body() for r in results]
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+results_cache = ResultsCache(
+    max_entries=int(os.getenv("RESULTS_CACHE_MAX_ENTRIES", 500)),
+    ttl=60*60*24*7,
+)
+
+embed_flight = SingleFlight()
+search_flight = SingleFlight()
+
+_embed_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMBED_WORKERS", 8)),
+    thread_name_prefix="embed",
+)
+
+
+def embed_async(query):
+    """
+    Start embedding query in the background (coalesced with identical
+    in-flight calls) and return a Future of the vector, so callers can do
+    other work, e.g. name-hit hydration, while the embedding API responds.
+    """
+    return _embed_pool.submit(lambda: embed_flight.do(query, lambda: cached_embed(query))[0])
+
+# Per-process cap on concurrent search-path DB queries: each source query of
+# a search, name-hit hydration and paper-title resolution take one slot.
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("SEARCH_MAX_CONCURRENT", 8)),
+    max_queue=int(os.getenv("SEARCH_MAX_QUEUE", 32)),
+    timeout=float(os.getenv("SEARCH_QUEUE_TIMEOUT", 20)),
+)
@@ -0,0 +1,62 @@
+"""
+Container entrypoint: starts the Streamlit server in this process and warms
+it as soon as the runtime exists, so the first visitor does not pay for
+warm-up. Takes the same --section.option=value flags as `streamlit run`:
+
+    python src/serve.py --server.port=8501 --server.address=0.0.0.0
+
+Warm-up has to run in the server process itself (the DB pool, clients and
+st.cache_* entries are per process), and only once the runtime exists,
+since st.cache_data calls made before then go to a throwaway cache.
+"""
+import time
+_import_t0 = time.perf_counter()
+
+import json
+import os
+import sys
+import threading
+
+from streamlit.runtime import Runtime
+from streamlit.web import bootstrap
+
+from warmup import ensure_warm
+
+_import_time = time.perf_counter() - _import_t0
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+
+def _parse_flags(argv):
+    """["--server.port=8501", ...] -> {"server.port": 8501, ...}"""
+    flags = {}
+    for arg in argv:
+        if not arg.startswith("--") or "=" not in arg:
+            raise SystemExit(f"Unsupported argument: {arg!r} (expected --section.option=value)")
+        name, value = arg[2:].split("=", 1)
+        try:
+            flags[name] = json.loads(value)
+        except ValueError:
+            flags[name] = value
+    return flags
+
+
+def _warm_when_ready():
+    while not Runtime.exists():
+        time.sleep(0.1)
+    try:
+        ensure_warm({"import": _import_time})
+    except Exception as e:
+        # The first session retries the blocking steps.
+        print(f"Warm-up failed: {e}", flush=True)
+
+
+def main(argv=None):
+    flags = _parse_flags(sys.argv[1:] if argv is None else argv)
+    bootstrap.load_config_options(flag_options=flags)
+    threading.Thread(target=_warm_when_ready, name="warm-up", daemon=True).start()
+    bootstrap.run(APP_SCRIPT, False, [], flags)
+
+
+if __name__ == "__main__":
+    main()
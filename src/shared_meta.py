@@ -0,0 +1,224 @@
+"""
+Read-only sidebar metadata shared by every worker process on a host.
+
+The authors and tags lists are laid out once in a memory-mapped file as
+string tables (a uint64 offset array plus UTF-8 data) with a per-source
+index range, so each worker maps the same pages instead of holding its own
+copy. The small values (sources, source caps, theorem count) live in the
+JSON header. Refreshes write a new file and os.replace it over the old one;
+readers notice the new inode and re-map.
+
+Enabled by setting SHARED_META_PATH (e.g. /dev/shm/theorem_search.meta).
+The file is rebuilt by whichever worker first finds it missing or older
+than SHARED_META_TTL seconds, or explicitly with
+
+    python src/shared_meta.py
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Mapping, Sequence
+
+from db import fetch_metadata
+
+SHARED_META_PATH = os.getenv("SHARED_META_PATH")
+SHARED_META_TTL = int(os.getenv("SHARED_META_TTL", 60*60*24*7))
+
+_MAGIC = b"TSMETA1\0"
+_PREFIX = struct.Struct("<8sQ")  # magic, header length
+_TABLES = ("authors", "tags")
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def write_metadata(path, metadata):
+    """
+    Atomically write metadata, as returned by db.fetch_metadata, to path.
+    """
+    blobs, tables, pos = [], {}, 0
+    for name in _TABLES:
+        strings, ranges = [], {}
+        for source, values in metadata[name].items():
+            start = len(strings)
+            strings.extend(v or "" for v in values or [])
+            ranges[source] = [start, len(strings)]
+        data = [s.encode("utf-8") for s in strings]
+        offsets = [0]
+        for d in data:
+            offsets.append(offsets[-1] + len(d))
+        offsets_blob = struct.pack(f"<{len(offsets)}Q", *offsets)
+        data_blob = b"".join(data)
+        tables[name] = {
+            "offsets": pos,
+            "count": len(strings),
+            "data": pos + len(offsets_blob),
+            "ranges": ranges,
+        }
+        blob = offsets_blob + data_blob
+        blob += b"\0" * (_align(len(blob)) - len(blob))
+        blobs.append(blob)
+        pos += len(blob)
+
+    header = json.dumps({
+        "sources": metadata["sources"],
+        "source_caps": metadata["source_caps"],
+        "theorem_count": metadata["theorem_count"],
+        "tables": tables,
+        "written_at": time.time(),
+    }).encode("utf-8")
+    header += b" " * (_align(_PREFIX.size + len(header)) - _PREFIX.size - len(header))
+
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class StringTable(Sequence):
+    """A read-only slice of strings decoded on access from the mapped file."""
+
+    def __init__(self, buf, offsets, data_start, start, stop):
+        self._buf = buf
+        self._offsets = offsets
+        self._data_start = data_start
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        k = self._start + i
+        lo = self._data_start + self._offsets[k]
+        hi = self._data_start + self._offsets[k + 1]
+        return str(self._buf[lo:hi], "utf-8")
+
+
+class _PerSource(Mapping):
+    def __init__(self, tables):
+        self._tables = tables
+
+    def __getitem__(self, source):
+        return self._tables[source]
+
+    def __iter__(self):
+        return iter(self._tables)
+
+    def __len__(self):
+        return len(self._tables)
+
+
+class SharedMetadata:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _PREFIX.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path}: not a shared metadata file")
+        header = json.loads(self._mm[_PREFIX.size:_PREFIX.size + header_len])
+        base = _PREFIX.size + header_len
+        buf = memoryview(self._mm)
+
+        self.sources = header["sources"]
+        self.source_caps = header["source_caps"]
+        self.theorem_count = header["theorem_count"]
+        self.written_at = header["written_at"]
+        for name in _TABLES:
+            t = header["tables"][name]
+            offsets = buf[base + t["offsets"]:base + t["data"]].cast("Q")
+            setattr(self, name, _PerSource({
+                source: StringTable(buf, offsets, base + t["data"], start, stop)
+                for source, (start, stop) in t["ranges"].items()
+            }))
+
+    def is_current(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return True
+        return (st.st_ino, st.st_mtime_ns) == (self._stat.st_ino, self._stat.st_mtime_ns)
+
+
+def _written_at(path):
+    """The file's written_at, or None if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != _MAGIC:
+                return None
+            return json.loads(f.read(header_len))["written_at"]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def refresh(path=SHARED_META_PATH, blocking=True, max_age=None):
+    """
+    Rebuild the file from the database under an exclusive lock. With
+    blocking=False, returns False if another process is already rebuilding.
+    With max_age, also returns False if, once the lock is held, the file
+    turns out to be younger than max_age seconds, i.e. another process
+    rebuilt it while this one was waiting.
+    """
+    with open(f"{path}.lock", "w") as lock:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock, flags)
+        except BlockingIOError:
+            return False
+        if max_age is not None:
+            written_at = _written_at(path)
+            if written_at is not None and time.time() - written_at <= max_age:
+                return False
+        write_metadata(path, fetch_metadata())
+        return True
+
+
+_attached = None
+_attach_lock = threading.Lock()
+_refresh_thread = None
+
+
+def shared_metadata(path=SHARED_META_PATH):
+    """
+    Return this process's view of the shared metadata, creating the file if
+    it is missing, re-mapping it after a swap, and kicking off a rebuild
+    once it is older than SHARED_META_TTL.
+    """
+    global _attached, _refresh_thread
+    with _attach_lock:
+        if not os.path.exists(path):
+            refresh(path, max_age=SHARED_META_TTL)
+        if _attached is None or not _attached.is_current(path):
+            _attached = SharedMetadata(path)
+        stale = time.time() - _attached.written_at > SHARED_META_TTL
+        if stale and (_refresh_thread is None or not _refresh_thread.is_alive()):
+            _refresh_thread = threading.Thread(
+                target=refresh, args=(path, False, SHARED_META_TTL), daemon=True
+            )
+            _refresh_thread.start()
+        return _attached
+
+
+if __name__ == "__main__":
+    if not SHARED_META_PATH:
+        raise SystemExit("SHARED_META_PATH is not set")
+    refresh()
+    print(f"Wrote {SHARED_META_PATH}", flush=True)
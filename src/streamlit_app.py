@@ -1,3 +1,6 @@
+import time
+_import_t0 = time.perf_counter()
+
 import html
 import os
 import re
@@ -5,7 +8,7 @@ import streamlit as st
 import streamlit.components.v1 as components
 from latex_clean import clean_latex_for_display
 from db import (
-    fetch_results,
+    iter_results,
     load_theorem_count,
     load_tags,
     load_authors,
@@ -13,21 +16,47 @@ from db import (
     insert_feedback,
     load_source_caps,
     insert_query,
-    cached_embed
+    load_theorem_body,
+    load_theorem_bodies,
+    fetch_rows_by_ids
 )
+from name_index import NAME_FAST_PATH, current_name_index, merge_name_hits
+from records import fit_to_budget
+from concurrency import Overloaded
+from search import admission, build_filter_clauses, embed_async, results_cache, search_flight, search_key
+from shared_meta import SHARED_META_PATH, shared_metadata
 from utils import (
-    metadata_sources,
     serialize_filters,
     active_filters,
     SOURCE_FILTERS,
     parse_paper_filter)
-import time
+from warmup import ensure_warm
+
+_import_time = time.perf_counter() - _import_t0
 
 GA_MEASUREMENT_ID = os.getenv("GA_MEASUREMENT_ID", "G-XKM7PWE7EN")
 if not re.fullmatch(r"G-[A-Za-z0-9]{10}", GA_MEASUREMENT_ID or ""):
     GA_MEASUREMENT_ID = "G-XKM7PWE7EN"
 SAFE_GA_MEASUREMENT_ID = html.escape(GA_MEASUREMENT_ID, quote=True)
 
+def report_overloaded(e: Overloaded):
+    print(f"Search shed ({admission.shed} so far): {e}", flush=True)
+    if e.timed_out:
+        st.warning("The search service is busy and this search waited too long for a slot. Please try again in a moment.")
+    else:
+        st.warning(f"The search service is busy right now ({e.queue_depth} searches queued). Please try again in a moment.")
+
+
+def fetch_name_hits(slogan_ids, selected_sources, where_clauses, where_params):
+    # Best effort: when the DB is saturated, skip name hits rather than
+    # queueing ahead of the semantic search.
+    try:
+        with admission.admit():
+            return fetch_rows_by_ids(slogan_ids, selected_sources, where_clauses, where_params)
+    except Overloaded:
+        return []
+
+
 # Run the search query and store results in session state
 def run_search(query: str, filters: dict):
     if not filters:
@@ -37,83 +66,177 @@ def run_search(query: str, filters: dict):
     citation_weight = float(filters['citation_weight'])
     top_k = int(filters["top_k"])
 
-    t0 = time.time()
-    query_vec = cached_embed(query)
-    embed_time = time.time() - t0
-    t0 = time.time()
+    selected_sources = filters["sources"]
+    try:
+        where_clauses, where_params = build_filter_clauses(filters, source_caps)
+    except Overloaded as e:
+        report_overloaded(e)
+        return
 
-    where_clauses = []
-    where_params = {}
+    # Render results as soon as they arrive; the final list replaces this
+    # preview once every source has completed.
+    preview = st.empty()
+
+    # Named-theorem fast path: a query that is just a theorem's name is
+    # answered from the name index before, or instead of, the embedding call.
+    slogan_ids = []
+    name_index = current_name_index() if NAME_FAST_PATH != "off" else None
+    if name_index is not None:
+        slogan_ids = name_index.lookup(query)
+    name_hits = None
+    if slogan_ids and NAME_FAST_PATH == "direct":
+        name_hits = fetch_name_hits(slogan_ids, selected_sources, where_clauses, where_params)
+        if name_hits:
+            st.toast(f"**Name matches:** {len(name_hits)} &nbsp; (embedding skipped)", icon="⏱")
+            st.session_state["search_results"] = fit_to_budget(name_hits[:top_k])
+            st.session_state["search_query"] = query
+            st.session_state["search_filters"] = serialize_filters(filters)
+            return
+
+    cache_key = search_key(query, filters)
+    cached = results_cache.get(cache_key)
+
+    # The embedding call runs while name hits are hydrated and shown.
+    embed_t0 = time.time()
+    query_vec = embed_async(query) if cached is None else None
+
+    if name_hits is None:
+        name_hits = []
+        if slogan_ids:
+            name_hits = fetch_name_hits(slogan_ids, selected_sources, where_clauses, where_params)
+    if name_hits:
+        with preview.container():
+            for r in name_hits[:top_k]:
+                render_result(r, interactive=False)
+
+    if cached is not None:
+        st.toast("**Served from cache**", icon="⏱")
+        st.session_state["search_results"] = fit_to_budget(merge_name_hits(name_hits, cached, top_k))
+        st.session_state["search_query"] = query
+        st.session_state["search_filters"] = serialize_filters(filters)
+        return
 
-    selected_sources = filters["sources"]
-    meta_sources = metadata_sources(selected_sources, source_caps)
-
-    if filters["types"]:
-        where_clauses.append("theorem_type = ANY(%(types)s)")
-        where_params["types"] = filters["types"]
-
-    if meta_sources:
-        if filters["authors"]:
-            where_clauses.append("authors && %(authors)s")
-            where_params["authors"] = filters["authors"]
-
-        if filters["tags"]:
-            where_clauses.append("primary_category = ANY(%(tags)s)")
-            where_params["tags"] = filters["tags"]
-
-        if filters["year_range"]:
-            y0, y1 = filters["year_range"]
-            where_clauses.append("year BETWEEN %(year_min)s AND %(year_max)s")
-            where_params["year_min"] = y0
-            where_params["year_max"] = y1
-
-        if filters["journal_status"] != "All":
-            where_clauses.append("journal_published = %(is_journal)s")
-            where_params["is_journal"] = filters["journal_status"] == "Journal Article"
-
-        low, high = filters["citation_range"]
-        if filters["include_unknown_citations"]:
-            where_clauses.append(
-                "(citations BETWEEN %(cite_low)s AND %(cite_high)s OR citations IS NULL)"
-            )
-        else:
-            where_clauses.append("citations BETWEEN %(cite_low)s AND %(cite_high)s")
-
-        where_params["cite_low"] = low
-        where_params["cite_high"] = high
-
-        pf = filters.get("paper_filter", {"ids": set(), "titles": set()})
-        id_patterns = [f"{i}%" for i in pf["ids"]]
-        title_patterns = [f"%{t}%" for t in pf["titles"]]
-
-        or_clauses = []
-
-        if id_patterns:
-            or_clauses.append("paper_id LIKE ANY(%(paper_id_patterns)s)")
-            where_params["paper_id_patterns"] = id_patterns
-
-        if title_patterns:
-            or_clauses.append("title ILIKE ANY(%(title_patterns)s)")
-            where_params["title_patterns"] = title_patterns
-
-        if or_clauses:
-            where_clauses.append("(" + " OR ".join(or_clauses) + ")")
-
-    results = fetch_results(
-        query_vec=query_vec,
-        citation_weight=citation_weight,
-        top_k=top_k,
-        selected_sources=selected_sources,
-        filter_clauses=where_clauses,
-        filter_params=where_params,
-    )
-    st.toast(f"**Embed time:** {embed_time} &nbsp; **SQL time:** {time.time() - t0}", icon="⏱")
+    # Identical in-flight searches from other sessions share one embedding
+    # call and one DB execution; the leader streams into its own preview.
+    waiting = st.empty()
+
+    def semantic_search():
+        vec = query_vec.result()
+        timings = {"embed": time.time() - embed_t0}
+        on_wait = lambda depth: waiting.info(f"Waiting for a search slot ({depth} queued)...", icon="⏳")
+        with admission.admit(slots=len(selected_sources), on_wait=on_wait) as admitted:
+            waiting.empty()
+            timings["queue_depth"] = admitted.queue_depth
+            timings["queue_wait"] = admitted.waited
+            t0 = time.time()
+            rows = []
+            for rows in iter_results(
+                query_vec=vec,
+                citation_weight=citation_weight,
+                top_k=top_k,
+                selected_sources=selected_sources,
+                filter_clauses=where_clauses,
+                filter_params=where_params,
+            ):
+                timings.setdefault("first", time.time() - t0)
+                with preview.container():
+                    for r in merge_name_hits(name_hits, rows, top_k):
+                        render_result(r, interactive=False)
+            timings["sql"] = time.time() - t0
+        results_cache.put(cache_key, rows)
+        return rows, timings
+
+    try:
+        (semantic, timings), shared = search_flight.do(cache_key, semantic_search)
+    except Overloaded as e:
+        preview.empty()
+        waiting.empty()
+        report_overloaded(e)
+        return
+    preview.empty()
+    results = merge_name_hits(name_hits, semantic, top_k)
 
-    st.session_state["search_results"] = results
+    if shared:
+        st.toast("**Joined an identical in-flight search**", icon="⏱")
+    else:
+        st.toast(
+            f"**Embed time:** {timings['embed']} &nbsp; **First results:** {timings.get('first')} &nbsp; "
+            f"**SQL time:** {timings['sql']} &nbsp; **Queue position:** {timings['queue_depth']} "
+            f"(waited {timings['queue_wait']:.2f}s)",
+            icon="⏱",
+        )
+
+    st.session_state["search_results"] = fit_to_budget(results)
     st.session_state["search_query"] = query
     st.session_state["search_filters"] = serialize_filters(filters)
 
 
+def render_feedback(r):
+    submitted_key = f"submitted_{r['slogan_id']}"
+    vote_key = f"vote_{r['slogan_id']}"
+    already = st.session_state.get(submitted_key, False)
+    if already:
+        vote = st.session_state.get(vote_key)
+        st.markdown("👍" if vote == 1 else "👎")
+    else:
+        fb_key = f"feedback_{r['slogan_id']}"
+        fb = st.feedback("thumbs", key=fb_key)
+        if fb is not None:
+            payload = {
+                "feedback": 1 if fb == 1 else -1,
+                "query": st.session_state["search_query"],
+                "url": r["link"],
+                "theorem_name": r["theorem_name"],
+                "authors": ", ".join(r["authors"]) if r["authors"] else None,
+                **st.session_state["search_filters"],
+            }
+            insert_feedback(payload)
+            st.session_state[submitted_key] = True
+            st.session_state[vote_key] = fb
+            st.rerun(scope="fragment")
+
+
+# Keyed by slogan_id alone: underscored arguments are not hashed.
+@st.cache_data(ttl=60*60*24*7, max_entries=5000)
+def rendered_theorem(slogan_id, _theorem_name, _theorem_body):
+    if _theorem_body is None:
+        _theorem_body = load_theorem_body(slogan_id)
+    return f"**{_theorem_name}:** {clean_latex_for_display(_theorem_body)}"
+
+
+def render_result(r, interactive=True):
+    with st.expander(
+        f"***{r['title']}* &nbsp; | &nbsp; {', '.join(r['authors'])} &nbsp; | &nbsp; {r['source']}**",
+        expanded=True,
+    ):
+        theorem_col, feedback_col = st.columns([15, 1])
+        with theorem_col:
+            with st.expander(f"{r['theorem_slogan']}\n"):
+                st.markdown(rendered_theorem(r['slogan_id'], r['theorem_name'], r['theorem_body']))
+                cit_str = "Unknown" if r['citations'] is None else str(r['citations'])
+                st.caption(f"**Citations:** {cit_str} | **Year:** {r['year']} | **Tag:** {r['primary_category']}")
+        with feedback_col:
+            # Feedback widgets are keyed by slogan_id, so they can only be
+            # rendered once per run, i.e. not in the streaming preview.
+            if interactive:
+                render_feedback(r)
+            st.markdown(f"[Link]({r['link']})")
+
+
+def prefetch_bodies(results):
+    """
+    Memoize the Markdown of results whose bodies were trimmed to fit the
+    session budget, fetching the missing bodies in one query rather than
+    one per card.
+    """
+    missing = [r for r in results if not r.has_body()]
+    if not missing:
+        return
+    bodies = load_theorem_bodies(tuple(r["slogan_id"] for r in missing))
+    for r in missing:
+        rendered_theorem(r["slogan_id"], r["theorem_name"], bodies.get(r["slogan_id"]))
+
+
 def display_results():
     results = st.session_state.get("search_results")
     if results is None:
@@ -122,44 +245,15 @@ def display_results():
         st.warning("No results found for the current filters.")
         return
 
-    query = st.session_state["search_query"]
-    serialized_filters = st.session_state["search_filters"]
-
-    for i, r in enumerate(results):
-        with st.expander(
-            f"***{r['title']}* &nbsp; | &nbsp; {', '.join(r['authors'])} &nbsp; | &nbsp; {r['source']}**",
-            expanded=True,
-        ):
-            theorem_col, feedback_col = st.columns([15, 1])
-            with theorem_col:
-                with st.expander(f"{r['theorem_slogan']}\n"):
-                    st.markdown(f"**{r['theorem_name']}:** {clean_latex_for_display(r['theorem_body'])}")
-                    cit_str = "Unknown" if r['citations'] is None else str(r['citations'])
-                    st.caption(f"**Citations:** {cit_str} | **Year:** {r['year']} | **Tag:** {r['primary_category']}")
-            with feedback_col:
-                submitted_key = f"submitted_{r['slogan_id']}"
-                vote_key = f"vote_{r['slogan_id']}"
-                already = st.session_state.get(submitted_key, False)
-                if already:
-                    vote = st.session_state.get(vote_key)
-                    st.markdown("👍" if vote == 1 else "👎")
-                else:
-                    fb_key = f"feedback_{r['slogan_id']}"
-                    fb = st.feedback("thumbs", key=fb_key)
-                    if fb is not None:
-                        payload = {
-                            "feedback": 1 if fb == 1 else -1,
-                            "query": query,
-                            "url": r["link"],
-                            "theorem_name": r["theorem_name"],
-                            "authors": ", ".join(r["authors"]) if r["authors"] else None,
-                            **serialized_filters,
-                        }
-                        insert_feedback(payload)
-                        st.session_state[submitted_key] = True
-                        st.session_state[vote_key] = fb
-                        st.rerun()
-                st.markdown(f"[Link]({r['link']})")
+    prefetch_bodies(results)
+    for r in results:
+        result_card(r)
+
+
+# A feedback click reruns only its own card, not the whole script.
+@st.fragment
+def result_card(r):
+    render_result(r)
 
 # Header and sidebar
 st.set_page_config(page_title="Theorem Search Demo", layout="wide")
@@ -192,12 +286,41 @@ if "ga_loaded" not in st.session_state:
 st.title("Math Theorem Search")
 st.write("This tool finds mathematical theorems that are semantically similar to your query.")
 
+# Blocks only the first session of a process that was not started through
+# src/serve.py: secret, pooled connections and metadata. Query embeddings,
+# the name index and the cache warmer follow in the background.
+with st.spinner("Warming up..."):
+    ensure_warm({"import": _import_time})
+
 # Load metadata for filtering
-theorem_count = load_theorem_count()
-authors_per_source = load_authors()
-tags_per_source = load_tags()
-all_sources = load_sources()
-source_caps = load_source_caps()
+if SHARED_META_PATH:
+    shared = shared_metadata()
+    meta_version = shared.written_at
+    theorem_count = shared.theorem_count
+    authors_per_source = shared.authors
+    tags_per_source = shared.tags
+    all_sources = shared.sources
+    source_caps = shared.source_caps
+else:
+    meta_version = None
+    theorem_count = load_theorem_count()
+    authors_per_source = load_authors()
+    tags_per_source = load_tags()
+    all_sources = load_sources()
+    source_caps = load_source_caps()
+
+# The sorted option lists are built once per selection and metadata version
+# and shared by every session, instead of re-decoding every author and tag
+# from the mapped file on each rerun. cache_resource, as cache_data would
+# copy the whole list on every hit.
+@st.cache_resource(ttl=60*60*24*7, max_entries=64)
+def sidebar_options(kind, sources, version, _per_source):
+    return sorted({
+        v
+        for s in sources
+        if SOURCE_FILTERS[s][kind]
+        for v in _per_source.get(s, [])
+    })
 
 if 'show_success' not in st.session_state:
     st.session_state['show_success'] = False
@@ -235,12 +358,9 @@ with st.sidebar:
                 selected_types = []
 
             if caps["authors"]:
-                allowed_authors = sorted({
-                    a
-                    for s in selected_sources
-                    if SOURCE_FILTERS[s]["authors"]
-                    for a in authors_per_source.get(s, [])
-                })
+                allowed_authors = sidebar_options(
+                    "authors", tuple(selected_sources), meta_version, authors_per_source
+                )
                 selected_authors = st.multiselect(
                     "Filter by Author(s):",
                     allowed_authors
@@ -249,12 +369,9 @@ with st.sidebar:
                 selected_authors = []
 
             if caps["tags"]:
-                allowed_tags = sorted({
-                    t
-                    for s in selected_sources
-                    if SOURCE_FILTERS[s]["tags"]
-                    for t in tags_per_source.get(s, [])
-                })
+                allowed_tags = sidebar_options(
+                    "tags", tuple(selected_sources), meta_version, tags_per_source
+                )
                 selected_tags = st.multiselect(
                     "Filter by Tag / Category:",
                     allowed_tags
@@ -1,7 +1,4 @@
 import re
-from dotenv import load_dotenv
-
-load_dotenv()
 
 SOURCE_FILTERS = {
     "Stacks Project": {
@@ -136,6 +133,67 @@ def parse_paper_filter(raw: str) -> dict:
             titles.add(normalize_title(token))
     return {"ids": ids, "titles": titles}
 
+def _string_list(raw: dict, key: str, label: str | None = None) -> list:
+    value = raw.get(key)
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{label or key} must be a list of strings")
+    return list(value)
+
+def _number_pair(raw: dict, key: str, default):
+    value = raw.get(key, default)
+    if value is None:
+        return None
+    if (
+        not isinstance(value, (list, tuple))
+        or len(value) != 2
+        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+    ):
+        raise ValueError(f"{key} must be a [low, high] pair of numbers")
+    return tuple(value)
+
+def filters_from_json(raw: dict) -> dict:
+    """
+    Build a filters dict, as assembled by the sidebar, from a JSON object.
+    Missing keys take the sidebar defaults; paper_filter may be the raw
+    comma-separated string or an {"ids": [...], "titles": [...]} object.
+    Raises ValueError for values of the wrong shape, e.g. a string where a
+    list is expected or a range that is not a [low, high] pair.
+    """
+    raw = raw or {}
+    if not isinstance(raw, dict):
+        raise ValueError("filters must be an object")
+    sources = _string_list(raw, "sources") or ["arXiv"]
+    caps = active_filters(sources)
+
+    pf = raw.get("paper_filter") or ""
+    if isinstance(pf, str):
+        pf = parse_paper_filter(pf)
+    elif isinstance(pf, dict):
+        pf = {"ids": set(_string_list(pf, "ids", "paper_filter.ids")),
+              "titles": set(_string_list(pf, "titles", "paper_filter.titles"))}
+    else:
+        raise ValueError("paper_filter must be a string or an {ids, titles} object")
+
+    journal_status = raw.get("journal_status", "All")
+    if journal_status not in ("All", "Journal Article", "Preprint"):
+        raise ValueError('journal_status must be "All", "Journal Article" or "Preprint"')
+
+    return {
+        "authors": _string_list(raw, "authors"),
+        "types": [t.lower() for t in _string_list(raw, "types")],
+        "tags": _string_list(raw, "tags"),
+        "sources": sources,
+        "paper_filter": pf,
+        "year_range": _number_pair(raw, "year_range", (1991, 2026) if caps["year"] else None),
+        "journal_status": journal_status,
+        "citation_range": _number_pair(raw, "citation_range", (0, 1502)) or (0, 1502),
+        "citation_weight": float(raw.get("citation_weight", 0.0)),
+        "include_unknown_citations": bool(raw.get("include_unknown_citations", True)),
+        "top_k": int(raw.get("top_k", 25)),
+    }
+
 def json_safe(obj):
     if isinstance(obj, dict):
         return {k: json_safe(v) for k, v in obj.items()}
@@ -0,0 +1,127 @@
+"""
+Warm-up phase run once per server process. The blocking part fetches the DB
+secret, pre-opens pooled connections and loads the sidebar metadata the
+first page needs; the optional part (pre-embedding common queries, building
+the name index) and the cache warmer then run in a background thread so
+they never delay a render. Also runnable on its own to measure cold-start
+costs:
+
+    python src/warmup.py
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+from cache_warmer import WARM_MAX_QUERIES, start_cache_warmer
+from name_index import NAME_FAST_PATH, build_name_index
+from shared_meta import SHARED_META_PATH, shared_metadata
+
+
+def warmup_queries():
+    """Queries to pre-embed: one per line in WARMUP_QUERIES_FILE, if set."""
+    path = os.getenv("WARMUP_QUERIES_FILE")
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _timed(timings, optional=False):
+    """
+    A step runner recording {name: seconds}. Optional steps log their
+    failure and return None instead of raising, so one failing step does
+    not skip the ones after it.
+    """
+    def step(name, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            if not optional:
+                raise
+            print(f"Warm-up: {name} failed: {e}", flush=True)
+            return None
+        timings[name] = time.perf_counter() - t0
+        return result
+    return step
+
+
+def warm_up_core():
+    """The steps the first render needs. Returns {step: seconds}."""
+    timings = {}
+    step = _timed(timings)
+    step("secret", db._get_secret)
+    step("pool", db.prewarm_pool)
+    if SHARED_META_PATH:
+        step("shared_metadata", shared_metadata)
+    else:
+        step("sources", db.load_sources)
+        step("source_caps", db.load_source_caps)
+        step("authors", db.load_authors)
+        step("tags", db.load_tags)
+        step("theorem_count", db.load_theorem_count)
+    return timings
+
+
+def warm_up_optional(queries=None):
+    """Steps that only make later searches faster. Returns {step: seconds}."""
+    timings = {}
+    step = _timed(timings, optional=True)
+    queries = step("warmup_queries", warmup_queries) if queries is None else queries
+    if queries:
+        def embed_one(query):
+            try:
+                db.cached_embed(query)
+                return True
+            except Exception as e:
+                print(f"Warm-up: embedding {query!r} failed: {e}", flush=True)
+                return False
+
+        def embed_all():
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                return sum(pool.map(embed_one, queries))
+        step(f"embed ({len(queries)} queries)", embed_all)
+    if NAME_FAST_PATH != "off":
+        step("name_index", build_name_index)
+    return timings
+
+
+def warm_up(queries=None):
+    """Run every warm-up step in the calling thread and return {step: seconds}."""
+    return {**warm_up_core(), **warm_up_optional(queries)}
+
+
+def format_timings(timings):
+    return ", ".join(f"{name}: {secs:.3f}s" for name, secs in timings.items())
+
+
+_warm_lock = threading.Lock()
+_core_timings = None
+
+
+def _warm_up_background():
+    print(f"Warm-up (background): {format_timings(warm_up_optional())}", flush=True)
+    if WARM_MAX_QUERIES > 0:
+        start_cache_warmer()
+
+
+def ensure_warm(extra_timings=None):
+    """
+    Run the blocking warm-up once per process and start the optional steps
+    in a daemon thread. Later calls return at once; a call made while the
+    first one is still running waits for it.
+    """
+    global _core_timings
+    with _warm_lock:
+        if _core_timings is None:
+            timings = {**(extra_timings or {}), **warm_up_core()}
+            print(f"Warm-up: {format_timings(timings)}", flush=True)
+            threading.Thread(target=_warm_up_background, name="warm-up", daemon=True).start()
+            _core_timings = timings
+        return _core_timings
+
+
+if __name__ == "__main__":
+    print(f"Warm-up: {format_timings(warm_up())}", flush=True)